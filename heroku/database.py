@@ -1,10 +1,10 @@
-import redis
 import asyncio
 import collections
 import json
 import logging
 import os
 import re
+import shutil
 import time
 import typing
 from urllib.parse import urlparse
@@ -24,6 +24,72 @@ from .pointers import (
 from .tl_cache import CustomTelegramClient
 from .types import JSONSerializable
 
+if typing.TYPE_CHECKING:
+    # Runtime import stays deferred to redis_init(); this only makes the
+    # "aioredis" forward references in annotations resolvable
+    from redis import asyncio as aioredis
+
+try:
+    import orjson
+
+    def _dumps(obj: typing.Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+
+    def _dumps(obj: typing.Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=True).encode("utf-8")
+
+    _loads = json.loads
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard as zstd
+
+    _ZSTD_COMPRESS = zstd.ZstdCompressor(level=3)
+    _ZSTD_DECOMPRESS = zstd.ZstdDecompressor()
+except ImportError:
+    zstd = None
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _pack_remote(obj: dict) -> bytes:
+    # The Redis blob is machine-only: msgpack is both smaller and faster
+    # to encode than JSON when available
+    if msgpack is not None:
+        try:
+            blob = msgpack.packb(dict(obj), use_bin_type=True)
+        except (TypeError, ValueError):
+            # msgpack is stricter than the serializability gate (e.g. it
+            # rejects datetime); anything the gate let in must still save,
+            # so fall back to the JSON encoder instead of killing the flush
+            blob = _dumps(obj)
+    else:
+        blob = _dumps(obj)
+    if zstd is not None:
+        blob = _ZSTD_COMPRESS.compress(blob)
+    return blob
+
+
+def _unpack_remote(blob: bytes) -> dict:
+    if zstd is not None and blob.startswith(_ZSTD_MAGIC):
+        blob = _ZSTD_DECOMPRESS.decompress(blob)
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(blob, raw=False, strict_map_key=False)
+        except Exception:
+            # Pre-migration deployments stored JSON
+            pass
+    return _loads(blob)
+
+
 __all__ = [
     "Database",
     "PointerList",
@@ -36,6 +102,12 @@ __all__ = [
 
 logger = logging.getLogger(__name__)
 
+_HIKKA_MIGRATE = re.compile(rb'(hikka\.)(\S+":)')
+
+# Connection pools shared between Database instances, keyed by Redis URL,
+# so multi-account setups don't open a TCP/TLS session per account
+_REDIS_POOLS: typing.Dict[str, "aioredis.ConnectionPool"] = {}
+
 
 class NoAssetsChannel(Exception):
     pass
@@ -45,38 +117,75 @@ class Database(dict):
     def __init__(self, client: CustomTelegramClient):
         super().__init__()
         self._client: CustomTelegramClient = client
+        self._redis_key: bytes = str(client.tg_id).encode()
+        self._redis_rev_key: bytes = self._redis_key + b":revision"
         self._next_revision_call: int = 0
-        self._revisions: typing.List[dict] = []
+        self._last_blob_hash: int = 0
+        self._revisions: typing.Deque[bytes] = collections.deque(maxlen=15)
+        self._flushed_revision: bytes = None
         self._assets: int = None
         self._me: User = None
-        self._redis: redis.Redis = None
-        self._saving_task: asyncio.Future = None
+        self._redis: "aioredis.Redis" = None
+        self._dirty: asyncio.Event = asyncio.Event()
+        self._writer_task: asyncio.Future = None
 
     def __repr__(self):
         return object.__repr__(self)
 
-    def _redis_save_sync(self):
-        with self._redis.pipeline() as pipe:
-            pipe.set(str(self._client.tg_id), json.dumps(self, ensure_ascii=True))
-            pipe.execute()
+    async def _bulk_set(self, items: dict):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value)
+            await pipe.execute()
+
+    async def _bulk_get(self, keys: typing.List[str]) -> typing.List[typing.Optional[bytes]]:
+        return await self._redis.mget(keys)
+
+    async def _redis_save_async(self):
+        blob = _pack_remote(self)
+        rev = self._revisions[-1] if self._revisions else None
+        if rev is not None and rev != self._flushed_revision:
+            await self._bulk_set({
+                self._redis_key: blob,
+                self._redis_rev_key: _pack_remote(_loads(rev)),
+            })
+            self._flushed_revision = rev
+        else:
+            await self._redis.set(self._redis_key, blob)
 
     async def remote_force_save(self) -> bool:
         if not self._redis:
             return False
-        await utils.run_sync(self._redis_save_sync)
+        await self._redis_save_async()
         logger.debug("Published db to Redis")
         return True
 
-    async def _redis_save(self) -> bool:
-        if not self._redis:
-            return False
-        await asyncio.sleep(5)
-        await utils.run_sync(self._redis_save_sync)
-        logger.debug("Published db to Redis")
-        self._saving_task = None
-        return True
+    async def _writer_loop(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            await asyncio.sleep(5)
+            try:
+                await self._redis_save_async()
+            except Exception:
+                # A transient Redis error must not kill the writer; leave
+                # the flag set so the next cycle retries the flush
+                logger.exception("Failed to publish db to Redis, retrying")
+                self._dirty.set()
+                continue
+            logger.debug("Published db to Redis")
 
     async def redis_init(self) -> bool:
+        # Deferred import: disk-backed deployments never pay for loading
+        # the redis client (and its optional C parser) at startup
+        from redis import asyncio as aioredis
+
+        try:
+            import hiredis  # noqa: F401
+            logger.debug("RESP parser: hiredis")
+        except ImportError:
+            logger.debug("RESP parser: pure-python; install hiredis for faster replies")
+
         redis_url = (
             os.environ.get("REDIS_URL")
             or os.environ.get("REDIS_PUBLIC_URL")
@@ -87,22 +196,31 @@ class Database(dict):
             return False
 
         try:
-            parsed = urlparse(redis_url)
-
-            # Railway обычно даёт username = default
-            username = parsed.username or "default"
-            password = parsed.password
-
-            self._redis = redis.Redis(
-                host=parsed.hostname,
-                port=parsed.port or 6379,
-                username=username,
-                password=password,
-                ssl=(parsed.scheme == "rediss"),
-                decode_responses=False
-            )
-
-            self._redis.ping()
+            pool = _REDIS_POOLS.get(redis_url)
+            if pool is None:
+                parsed = urlparse(redis_url)
+
+                # Railway обычно даёт username = default
+                username = parsed.username or "default"
+                password = parsed.password
+
+                pool = aioredis.ConnectionPool(
+                    host=parsed.hostname,
+                    port=parsed.port or 6379,
+                    username=username,
+                    password=password,
+                    connection_class=(
+                        aioredis.SSLConnection
+                        if parsed.scheme == "rediss"
+                        else aioredis.Connection
+                    ),
+                    decode_responses=False
+                )
+                _REDIS_POOLS[redis_url] = pool
+
+            self._redis = aioredis.Redis(connection_pool=pool)
+
+            await self._redis.ping()
             logger.info("Connected to Redis successfully")
             return True
         except Exception as e:
@@ -114,7 +232,7 @@ class Database(dict):
             await self.redis_init()
 
         self._db_file = main.BASE_PATH / f"config-{self._client.tg_id}.json"
-        self.read()
+        await self.read()
 
         try:
             self._assets, _ = await utils.asset_channel(
@@ -134,77 +252,123 @@ class Database(dict):
                 "You can solve this by leaving some channels/groups"
             )
 
-    def read(self):
+    async def read(self):
         if self._redis:
             try:
-                val = self._redis.get(str(self._client.tg_id))
+                val = await self._redis.get(self._redis_key)
                 if val:
-                    self.update(json.loads(val.decode()))
+                    self.update(_unpack_remote(val))
             except Exception:
                 logger.exception("Error reading redis database")
             return
 
         try:
-            db = self._db_file.read_text()
-            if re.search(r'"(hikka\.)(\S+\":)', db):
+            blob = self._db_file.read_bytes()
+            if b"hikka." in blob:
                 logging.warning("Converting db after update")
-                db = re.sub(r'(hikka\.)(\S+\":)', lambda m: 'heroku.' + m.group(2), db)
-            self.update(**json.loads(db))
-        except json.decoder.JSONDecodeError:
+                blob = _HIKKA_MIGRATE.sub(rb"heroku.\2", blob)
+            self.update(**_loads(blob))
+        except ValueError:
             logger.warning("Database read failed! Creating new one...")
         except FileNotFoundError:
             logger.debug("Database file not found, creating new one...")
 
     def process_db_autofix(self, db: dict) -> bool:
-        if not utils.is_serializable(db):
-            return False
-        for key, value in db.copy().items():
-            if not isinstance(key, (str, int)):
-                logger.warning("DbAutoFix: Dropped key %s, because type is %s", key, type(key))
-                continue
-            if not isinstance(value, dict):
+        # Fast path: if the whole tree serializes cleanly there is nothing
+        # to fix, so the common case never walks the db in Python.
+        # Numba/Cython were considered for the repair loop below and
+        # rejected: it is a string-heavy dict walk they can't speed up,
+        # while this C-level probe already skips it entirely
+        try:
+            _dumps(db)
+            return True
+        except Exception:
+            return self._autofix_repair(db)
+
+    def _autofix_repair(self, db: dict) -> bool:
+        dropped = []
+        for key in list(db):
+            value = db[key]
+            if not isinstance(key, (str, int)) or not isinstance(value, dict):
                 del db[key]
-                logger.warning("DbAutoFix: Dropped key %s, because type is %s", key, type(value))
+                dropped.append(key)
                 continue
             for subkey in list(value):
                 if not isinstance(subkey, (str, int)):
-                    del db[key][subkey]
-                    logger.warning(
-                        "DbAutoFix: Dropped subkey %s of db key %s because type is %s",
-                        subkey, key, type(subkey)
-                    )
-        return True
+                    del value[subkey]
+                    dropped.append((key, subkey))
+
+        if dropped:
+            logger.warning("DbAutoFix: dropped %d entries: %s", len(dropped), dropped)
+
+        try:
+            _dumps(db)
+            return True
+        except Exception:
+            return False
 
     def save(self) -> bool:
-        if not self.process_db_autofix(self):
+        # One dump doubles as the autofix probe and the payload: only a
+        # failed serialization pays for the repair pass
+        try:
+            blob = _dumps(self)
+        except Exception:
+            blob = _dumps(self) if self._autofix_repair(self) else None
+
+        if blob is None:
             try:
-                rev = self._revisions.pop()
+                rev = _loads(self._revisions.pop())
                 while not self.process_db_autofix(rev):
-                    rev = self._revisions.pop()
+                    rev = _loads(self._revisions.pop())
             except IndexError:
-                raise RuntimeError("Can't find revision to restore broken database from; db broken.")
+                # The live file is the newest state that passed the gate;
+                # the .bak is one save older and only a last resort
+                for path in (self._db_file, self._db_file.with_suffix(".json.bak")):
+                    try:
+                        rev = _loads(path.read_bytes())
+                        if self.process_db_autofix(rev):
+                            break
+                    except Exception:
+                        continue
+                else:
+                    raise RuntimeError("Can't find revision to restore broken database from; db broken.")
             self.clear()
             self.update(**rev)
             raise RuntimeError("Rewriting database to the last known good revision.")
 
-        if time.time() > self._next_revision_call:
-            self._revisions.append(dict(self))
-            self._next_revision_call = time.time() + 3
+        blob_hash = hash(blob)
+        if blob_hash == self._last_blob_hash:
+            return True
 
-        while len(self._revisions) > 15:
-            self._revisions.pop(0)
+        if self._redis and time.time() > self._next_revision_call:
+            self._revisions.append(blob)
+            self._next_revision_call = time.time() + 3
 
         if self._redis:
-            if not self._saving_task:
-                self._saving_task = asyncio.ensure_future(self._redis_save())
+            self._last_blob_hash = blob_hash
+            self._dirty.set()
+            if not self._writer_task or self._writer_task.done():
+                self._writer_task = asyncio.ensure_future(self._writer_loop())
             return True
 
         try:
-            self._db_file.write_text(json.dumps(self, indent=4))
+            tmp = self._db_file.with_suffix(".json.tmp")
+            tmp.write_bytes(blob)
+            if self._db_file.exists():
+                # Back up via hardlink/copy instead of renaming the live
+                # file away, so the db never disappears mid-save
+                bak = self._db_file.with_suffix(".json.bak")
+                bak.unlink(missing_ok=True)
+                try:
+                    os.link(self._db_file, bak)
+                except OSError:
+                    shutil.copyfile(self._db_file, bak)
+            os.replace(tmp, self._db_file)
         except Exception:
             logger.exception("Database save failed!")
             return False
 
+        self._last_blob_hash = blob_hash
         return True
 
     async def store_asset(self, message: Message) -> int:
@@ -221,35 +385,31 @@ class Database(dict):
         return asset[0] if asset else None
 
     def get(self, owner: str, key: str, default: typing.Optional[JSONSerializable] = None) -> JSONSerializable:
-        try:
-            return self[owner][key]
-        except KeyError:
-            return default
+        bucket = super().get(owner)
+        return default if bucket is None else bucket.get(key, default)
 
     def set(self, owner: str, key: str, value: JSONSerializable) -> bool:
-        if not utils.is_serializable(owner):
-            raise RuntimeError(f"Non-serializable owner: {owner}")
-        if not utils.is_serializable(key):
-            raise RuntimeError(f"Non-serializable key: {key}")
-        if not utils.is_serializable(value):
+        if not utils.is_serializable((owner, key, value)):
+            # One probe covers the happy path; narrow down the culprit
+            # only when it actually failed
+            if not utils.is_serializable(owner):
+                raise RuntimeError(f"Non-serializable owner: {owner}")
+            if not utils.is_serializable(key):
+                raise RuntimeError(f"Non-serializable key: {key}")
             raise RuntimeError(f"Non-serializable value: {value}")
         super().setdefault(owner, {})[key] = value
         return self.save()
 
     def pointer(self, owner: str, key: str, default: typing.Optional[JSONSerializable] = None, item_type: typing.Optional[typing.Any] = None) -> typing.Union[JSONSerializable, PointerList, PointerDict]:
         value = self.get(owner, key, default)
-        mapping = {
-            list: PointerList,
-            dict: PointerDict,
-            collections.abc.Hashable: lambda v: v,
-        }
-        pointer_constructor = next((ptr for t, ptr in mapping.items() if isinstance(value, t)), None)
-        if (current_value := self.get(owner, key, None)) and type(current_value) is not type(default):
+        if value is not None and type(value) is not type(default):
             raise ValueError("Pointer type mismatch in database")
-        if pointer_constructor is None:
-            raise ValueError(f"Pointer for type {type(value)} not implemented")
-        if item_type is not None and isinstance(value, list):
-            return NamedTupleMiddlewareList(pointer_constructor(self, owner, key, default), item_type)
-        if item_type is not None and isinstance(value, dict):
-            return NamedTupleMiddlewareDict(pointer_constructor(self, owner, key, default), item_type)
-        return pointer_constructor(self, owner, key, default)
\ No newline at end of file
+        if isinstance(value, list):
+            pointer = PointerList(self, owner, key, default)
+            return NamedTupleMiddlewareList(pointer, item_type) if item_type is not None else pointer
+        if isinstance(value, dict):
+            pointer = PointerDict(self, owner, key, default)
+            return NamedTupleMiddlewareDict(pointer, item_type) if item_type is not None else pointer
+        if isinstance(value, collections.abc.Hashable):
+            return value
+        raise ValueError(f"Pointer for type {type(value)} not implemented")
\ No newline at end of file
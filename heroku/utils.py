@@ -48,6 +48,11 @@ from datetime import timedelta
 from urllib.parse import urlparse
 import emoji
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 import git
 import grapheme
 import herokutl
@@ -1297,7 +1302,18 @@ def is_serializable(x: typing.Any, /) -> bool:
     :return: True if object is JSON-serializable, False otherwise
     """
     try:
-        json.dumps(x)
+        if orjson is not None:
+            # OPT_PASSTHROUGH_DATETIME keeps the probe as strict as
+            # stdlib json: datetime values must be rejected here, not
+            # silently persisted as strings that change type on reload.
+            # Known gap: orjson still accepts uuid.UUID, which json would
+            # reject — it comes back as str after a restart
+            orjson.dumps(
+                x,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        else:
+            json.dumps(x)
         return True
     except Exception:
         return False